@@ -1,25 +1,41 @@
+import io
 import os
 import re
 import base64
+import gzip
 import mimetypes
 import uuid
+import urllib.parse
 import json
+import logging
 import calendar
+import time
+import hashlib
+import hmac
+import threading
+from functools import lru_cache
+from collections import OrderedDict
 from typing import Dict, List, Optional
-import boto3
-import urllib.request
-import urllib.error
-import traceback
-from datetime import date, datetime
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
 from zoneinfo import ZoneInfo
-from pypdf import PdfReader
-from openpyxl import Workbook
-from openpyxl.styles import Alignment
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used when it is not packaged
+    orjson = None
 
 from parser_horizon import parse_calls
 from parser_edf import parse_edf
 
 
+# Tracebacks go through logging so the Lambda runtime ships each one as a single
+# CloudWatch record (print() output is split line by line).
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
 class ApiError(Exception):
     def __init__(self, status_code: int, code: str, message: str, **meta):
         super().__init__(message)
@@ -35,11 +51,48 @@ class ApiError(Exception):
                 payload[k] = v
         return payload
 
-s3 = boto3.client(
-    "s3",
-    region_name="eu-central-1",
-    endpoint_url="https://s3.eu-central-1.amazonaws.com",
-        )
+S3_REGION = "eu-central-1"
+S3_ENDPOINT = "https://s3.eu-central-1.amazonaws.com"
+
+# boto3 is imported and the client built on first use: serving the UI and assets
+# never touches S3, so those cold starts skip botocore's setup entirely.
+_s3 = None
+_S3_LOCK = threading.Lock()
+
+
+def _get_s3():
+    global _s3
+    if _s3 is None:
+        with _S3_LOCK:
+            if _s3 is None:
+                import boto3
+                from botocore.config import Config
+
+                # One pooled connection per concurrent PDF download (botocore's default
+                # pool is 10), kept alive between warm invocations.
+                _s3 = boto3.client(
+                    "s3",
+                    region_name=S3_REGION,
+                    endpoint_url=S3_ENDPOINT,
+                    config=Config(
+                        max_pool_connections=max(10, PDF_MAX_WORKERS),
+                        tcp_keepalive=True,
+                    ),
+                )
+    return _s3
+
+
+_lambda_client = None
+
+
+def _get_lambda():
+    global _lambda_client
+    if _lambda_client is None:
+        import boto3
+
+        _lambda_client = boto3.client("lambda", region_name=os.environ.get("AWS_REGION") or S3_REGION)
+    return _lambda_client
+
 
 BUCKET = os.environ.get("BUCKET_NAME", "")
 def _require_bucket():
@@ -52,13 +105,67 @@ OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")  # keep secret in Lambda env v
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-5-mini")
 OPENAI_MAX_TOPICS = int(os.environ.get("OPENAI_MAX_TOPICS", "0"))  # 0 = no cap
 OPENAI_BODY_MAX_CHARS = int(os.environ.get("OPENAI_BODY_MAX_CHARS", "6000"))
+OPENAI_SUMMARY_CACHE_MAX = int(os.environ.get("OPENAI_SUMMARY_CACHE_MAX", "1024"))
+OPENAI_MAX_WORKERS = int(os.environ.get("OPENAI_MAX_WORKERS", "8"))
+OPENAI_BATCH_SIZE = int(os.environ.get("OPENAI_BATCH_SIZE", "0"))  # topics per request; 0/1 = one per topic
+OPENAI_RESPONSES_URL = "https://api.openai.com/v1/responses"
 DEFAULT_MIN_BUDGET_M = float(os.environ.get("DEFAULT_MIN_BUDGET_M", "0"))
+PDF_MAX_WORKERS = int(os.environ.get("PDF_MAX_WORKERS", "6"))
+MAX_PDF_FILES = 6  # per /presign and /process request
+# Threads per document for page extraction (1 = serial). pypdf extraction is mostly
+# GIL-bound, so this only pays off on large, heavily compressed PDFs.
+PDF_PAGE_WORKERS = int(os.environ.get("PDF_PAGE_WORKERS", "1"))
+PDF_PAGE_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PAGE_PARALLEL_MIN_PAGES", "8"))
+PDF_TEXT_CACHE_MAX = int(os.environ.get("PDF_TEXT_CACHE_MAX", "8"))  # 0 = disabled
 DOC_HORIZON = "horizon"
 DOC_EDF = "edf"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 UI_PATH = os.path.join(os.path.dirname(__file__), "ui.html")
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
 
-def _serve_asset(request_path: str):
+ASSET_CACHE_MAX_BYTES = 2 * 1024 * 1024
+
+
+def _is_compressible(ctype: str) -> bool:
+    return ctype.startswith("text/") or ctype in (
+        "application/javascript",
+        "application/json",
+        "image/svg+xml",
+    )
+
+
+def _load_asset_cache() -> Dict[str, tuple]:
+    """
+    Read packaged assets once per Lambda container:
+    {abs_path: (content_type, base64_body, base64_gzip_body or None)}.
+    Files bigger than ASSET_CACHE_MAX_BYTES are left out and read from disk on request.
+    """
+    cache: Dict[str, tuple] = {}
+    for root, _dirs, files in os.walk(ASSETS_DIR):
+        for name in files:
+            abs_path = os.path.abspath(os.path.join(root, name))
+            try:
+                if os.path.getsize(abs_path) > ASSET_CACHE_MAX_BYTES:
+                    continue
+                with open(abs_path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            ctype, _ = mimetypes.guess_type(abs_path)
+            ctype = ctype or "application/octet-stream"
+            gz_body = None
+            if _is_compressible(ctype):
+                gz = gzip.compress(data, compresslevel=9)
+                if len(gz) < len(data):
+                    gz_body = base64.b64encode(gz).decode("utf-8")
+            cache[abs_path] = (ctype, base64.b64encode(data).decode("utf-8"), gz_body)
+    return cache
+
+
+_ASSET_CACHE = _load_asset_cache()
+
+
+def _serve_asset(request_path: str, accept_gzip: bool = False):
     """
     Serve files packaged inside Lambda under aws_lambda/assets/*
     Example: GET /assets/adeptic.png
@@ -76,22 +183,37 @@ def _serve_asset(request_path: str):
     if not abs_path.startswith(assets_root + os.sep):
         return {"statusCode": 403, "headers": {"Content-Type": "text/plain"}, "body": "Forbidden"}
 
-    if not os.path.exists(abs_path):
-        return {"statusCode": 404, "headers": {"Content-Type": "text/plain"}, "body": "Not found"}
+    cached = _ASSET_CACHE.get(abs_path)
+    gz_body = None
+    if cached:
+        ctype, body, gz_body = cached
+    else:
+        if not os.path.exists(abs_path):
+            return {"statusCode": 404, "headers": {"Content-Type": "text/plain"}, "body": "Not found"}
+
+        with open(abs_path, "rb") as f:
+            data = f.read()
 
-    with open(abs_path, "rb") as f:
-        data = f.read()
+        ctype, _ = mimetypes.guess_type(abs_path)
+        ctype = ctype or "application/octet-stream"
+        body = base64.b64encode(data).decode("utf-8")
+
+    headers = {
+        "Content-Type": ctype,
+        "Cache-Control": "public, max-age=86400",
+        "access-control-allow-origin": "*",
+    }
+    if gz_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if accept_gzip:
+            headers["Content-Encoding"] = "gzip"
+            body = gz_body
 
-    ctype, _ = mimetypes.guess_type(abs_path)
     return {
         "statusCode": 200,
-        "headers": {
-            "Content-Type": ctype or "application/octet-stream",
-            "Cache-Control": "public, max-age=86400",
-            "access-control-allow-origin": "*",
-        },
+        "headers": headers,
         "isBase64Encoded": True,
-        "body": base64.b64encode(data).decode("utf-8"),
+        "body": body,
     }
 EDF_CALL_FAMILY_LABELS = {
     "RA": "RA — Research Actions",
@@ -99,6 +221,68 @@ EDF_CALL_FAMILY_LABELS = {
     "CSA": "CSA — Coordination & Support Actions",
 }
 
+# int and float are globals, so an inline (int, float) tuple is rebuilt on every
+# isinstance call; the per-row budget checks share this one.
+NUMERIC_TYPES = (int, float)
+
+UNSAFE_FILENAME_TRANS = str.maketrans(dict.fromkeys('\\/:*?"<>|', "_"))
+RE_TASK_ID = re.compile(r"[0-9a-f]{32}")
+RE_WHITESPACE = re.compile(r"\s+")
+RE_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+RE_CALL_ROUND = re.compile(r"HORIZON-[A-Z0-9]+-(\d{4})-(\d{2})")
+RE_TRL_PATTERNS = (
+    re.compile(r"\bTRL\b\s*(\d+(?:\s*[-–—]\s*\d+)?)", flags=re.IGNORECASE),
+    re.compile(r"technology\s+readiness\s+level\s*[:\-]?\s*(\d+(?:\s*[-–—]\s*\d+)?)", flags=re.IGNORECASE),
+)
+RE_TRL_RANGE_DASH = re.compile(r"\s*[-–—]\s*")
+RE_LARGE_SCALE = re.compile(r"\blarge[-\s]?scale\b", flags=re.IGNORECASE)
+# Document-family ID tags, matched on the lowercased text. They start with a literal
+# (no \b / IGNORECASE) so the regex engine can jump between candidates; the word
+# boundary is checked in _count_id_tags.
+RE_EDF_ID_TAG = re.compile(r"edf-\d{4}-[a-z]{2,}")
+RE_HORIZON_ID_TAG = re.compile(r"horizon-[a-z0-9]+-\d{4}-")
+
+# Date / filter formats accepted by _parse_date and _parse_filter_range, one regex
+# each with a named alternative per format.
+RE_DATE = re.compile(
+    r"^(?:(?P<ymd_y>\d{4})-(?P<ymd_m>\d{2})-(?P<ymd_d>\d{2})"
+    r"|(?P<ym_y>\d{4})-(?P<ym_m>\d{2})"
+    r"|(?P<y>\d{4})"
+    r"|(?P<txt_d>\d{1,2})\s+(?P<txt_mon>[A-Za-z]{3,})\.?,?\s+(?P<txt_y>\d{4})"
+    r"|(?P<slash_d>\d{1,2})[./](?P<slash_m>\d{1,2})[./](?P<slash_y>\d{4}))$"
+)
+RE_FILTER_PERIOD = re.compile(
+    r"^(?P<y>\d{4})(?:-(?:[Qq](?P<q>[1-4])|(?P<m>\d{2})(?:-(?P<d>\d{2}))?))?$"
+)
+
+MONTHS_BY_NAME = {
+    "jan": 1, "january": 1,
+    "feb": 2, "february": 2,
+    "mar": 3, "march": 3,
+    "apr": 4, "april": 4,
+    "may": 5,
+    "jun": 6, "june": 6,
+    "jul": 7, "july": 7,
+    "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9,
+    "oct": 10, "october": 10,
+    "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+    # Italian month names (PDFs sometimes localized)
+    "gen": 1, "gennaio": 1,
+    "febbraio": 2,
+    "marzo": 3,
+    "aprile": 4,
+    "maggio": 5,
+    "giugno": 6,
+    "luglio": 7,
+    "agosto": 8,
+    "settembre": 9,
+    "ottobre": 10,
+    "novembre": 11,
+    "dicembre": 12,
+}
+
 try:
     with open(UI_PATH, "r", encoding="utf-8") as f:
         HTML_TEMPLATE = f.read()
@@ -131,6 +315,17 @@ def _render_html() -> str:
 
 
 HTML = _render_html()
+# Compressed once per container; served when the client accepts gzip (ui.html shrinks ~5x)
+HTML_GZIP_B64 = base64.b64encode(gzip.compress(HTML.encode("utf-8"), compresslevel=9)).decode("ascii")
+# Weak validator (same page whether sent gzipped or not): browsers revalidate on every
+# load (no-cache) and get an empty 304 while the deployed page is unchanged.
+HTML_ETAG = 'W/"' + hashlib.blake2b(HTML.encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+
+def _accepts_gzip(event) -> bool:
+    headers = event.get("headers") or {}
+    accept = headers.get("accept-encoding") or headers.get("Accept-Encoding") or ""
+    return "gzip" in accept.lower()
 
 
 def _safe_base_name(file_name: str) -> str:
@@ -138,7 +333,7 @@ def _safe_base_name(file_name: str) -> str:
     if not base:
         return "file"
 
-    base = re.sub(r"[\\/:*?\"<>|]", "_", base)
+    base = base.translate(UNSAFE_FILENAME_TRANS)
     base = base.strip(". ")
     name, _ext = os.path.splitext(base)
     cleaned = name or "file"
@@ -168,7 +363,7 @@ def _derive_stage_from_topic_id(topic_id: Optional[str], current: Optional[str]
 def _derive_call_round_from_topic_id(topic_id: Optional[str]) -> Optional[str]:
     if not topic_id:
         return None
-    m = re.search(r"HORIZON-[A-Z0-9]+-(\d{4})-(\d{2})", topic_id)
+    m = RE_CALL_ROUND.search(topic_id)
     if not m:
         return None
     return f"{m.group(1)}-{m.group(2)}"
@@ -177,17 +372,13 @@ def _derive_call_round_from_topic_id(topic_id: Optional[str]) -> Optional[str]:
 def _extract_trl_from_text(text: Optional[str]) -> Optional[str]:
     if not text:
         return None
-    normalized = re.sub(r"\s+", " ", str(text)).strip()
-    patterns = [
-        r"\bTRL\b\s*(\d+(?:\s*[-–—]\s*\d+)?)",
-        r"technology\s+readiness\s+level\s*[:\-]?\s*(\d+(?:\s*[-–—]\s*\d+)?)",
-    ]
-    for pattern in patterns:
-        m = re.search(pattern, normalized, flags=re.IGNORECASE)
+    normalized = RE_WHITESPACE.sub(" ", str(text)).strip()
+    for pattern in RE_TRL_PATTERNS:
+        m = pattern.search(normalized)
         if not m:
             continue
         raw_val = m.group(1)
-        cleaned = re.sub(r"\s*[-–—]\s*", "-", raw_val).strip()
+        cleaned = RE_TRL_RANGE_DASH.sub("-", raw_val).strip()
         return cleaned
     return None
 
@@ -220,13 +411,17 @@ def _edf_is_large_scale(row: Dict) -> bool:
     if _has_ls(row.get("topic_id")) or _has_ls(row.get("call_id")):
         return True
 
-    text_blob = " ".join(
-        [
-            str(row.get("topic_title") or ""),
-            str(row.get("topic_description_verbatim") or ""),
-        ]
+    # Search each field on its own instead of joining them into one blob; only a
+    # match spanning the joining space needs the short window around it.
+    title = str(row.get("topic_title") or "")
+    desc = str(row.get("topic_description_verbatim") or "")
+    if RE_LARGE_SCALE.search(title) or RE_LARGE_SCALE.search(desc):
+        return True
+    head = title[-12:]
+    return any(
+        m.start() < len(head) < m.end()
+        for m in RE_LARGE_SCALE.finditer(f"{head} {desc[:12]}")
     )
-    return bool(re.search(r"\blarge[-\s]?scale\b", text_blob, flags=re.IGNORECASE))
 
 
 def _funding_percentage(row: Dict, doc_type: str) -> Optional[str]:
@@ -238,7 +433,7 @@ def _funding_percentage(row: Dict, doc_type: str) -> Optional[str]:
     """
     if doc_type == DOC_EDF:
         val = row.get("funding_percentage")
-        if isinstance(val, (int, float)) and val >= 0:
+        if isinstance(val, NUMERIC_TYPES) and val >= 0:
             return f"{val:g}%"
         if isinstance(val, str) and val.strip():
             return val.strip()
@@ -251,20 +446,16 @@ def _funding_percentage(row: Dict, doc_type: str) -> Optional[str]:
     if action in {"RIA", "CSA"}:
         return "100%"
     if action == "IA":
-        body_text = " ".join(
-            [
-                str(row.get("topic_body") or ""),
-                str(row.get("topic_description") or ""),
-                str(row.get("topic_description_verbatim") or ""),
-            ]
-        ).lower()
-        if "non-profit" in body_text or "non profit" in body_text:
-            return "100%"
+        # Check field by field instead of lowercasing one joined copy of all the texts
+        for key in ("topic_body", "topic_description", "topic_description_verbatim"):
+            low = str(row.get(key) or "").lower()
+            if "non-profit" in low or "non profit" in low:
+                return "100%"
         return "70%"
 
     # PCP / PPI depend on the call text; we only surface if a value is explicitly available
     explicit = row.get("funding_percentage")
-    if isinstance(explicit, (int, float)):
+    if isinstance(explicit, NUMERIC_TYPES):
         return f"{explicit:g}%"
     if isinstance(explicit, str) and explicit.strip():
         return explicit.strip()
@@ -284,11 +475,56 @@ def _row_min_budget(row: Dict) -> Optional[float]:
         "indicative_budget_eur_m",
     ):
         v = row.get(key)
-        if isinstance(v, (int, float)):
+        if isinstance(v, NUMERIC_TYPES):
             return float(v)
     return None
 
 
+# Extracted text survives across invocations on a warm container (LRU), keyed by the
+# object's ETag: re-running /process on the same PDF with other filters uploads it
+# under a new key, but with the same content hash, so extraction is skipped.
+_TEXT_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_TEXT_CACHE_LOCK = threading.Lock()
+
+
+def _text_cache_get(etag: str) -> Optional[tuple]:
+    with _TEXT_CACHE_LOCK:
+        entry = _TEXT_CACHE.get(etag)
+        if entry is not None:
+            _TEXT_CACHE.move_to_end(etag)
+        return entry
+
+
+def _text_cache_put(etag: str, entry: tuple) -> None:
+    if PDF_TEXT_CACHE_MAX <= 0:
+        return
+    with _TEXT_CACHE_LOCK:
+        _TEXT_CACHE[etag] = entry
+        _TEXT_CACHE.move_to_end(etag)
+        while len(_TEXT_CACHE) > PDF_TEXT_CACHE_MAX:
+            _TEXT_CACHE.popitem(last=False)
+
+
+def _fetch_and_extract(key: str):
+    """
+    Download a single PDF from S3 and extract its text.
+    Returns (text, doc_type); runs inside the worker threads of _process_pdf_keys.
+    """
+    obj = _get_s3().get_object(Bucket=BUCKET, Key=key)
+    etag = obj.get("ETag")
+    cached = _text_cache_get(etag) if etag else None
+    if cached is not None:
+        # Headers are enough on a hit: drop the body without reading it
+        obj["Body"].close()
+        return cached
+
+    text = extract_text(io.BytesIO(obj["Body"].read()))
+    result = (text, detect_document_family(text))
+    if etag:
+        _text_cache_put(etag, result)
+    return result
+
+
 def _process_pdf_keys(
     pdf_keys: List[str],
     context=None,
@@ -304,22 +540,41 @@ def _process_pdf_keys(
     if not pdf_keys:
         raise RuntimeError("Missing pdf_keys")
 
+    original_names = original_names or []
+
+    # A repeated key would be downloaded, parsed and merged twice: keep its first
+    # occurrence (and the matching original name).
+    first_idx: Dict[str, int] = {}
+    for idx, key in enumerate(pdf_keys):
+        first_idx.setdefault(key, idx)
+    if len(first_idx) < len(pdf_keys):
+        pdf_keys = list(first_idx)
+        original_names = [original_names[i] for i in first_idx.values() if i < len(original_names)]
+
+    if len(pdf_keys) > MAX_PDF_FILES:
+        raise ApiError(
+            413,
+            "TOO_MANY_FILES",
+            f"At most {MAX_PDF_FILES} PDFs can be processed at once ({len(pdf_keys)} given).",
+        )
+
     if min_budget_m is None:
         min_budget_m = DEFAULT_MIN_BUDGET_M
 
-    original_names = original_names or []
     edf_filters = edf_filters or {}
     expected_type_norm = (expected_type or "").strip().lower() or None
 
     all_rows: List[Dict] = []
     detected_type: Optional[str] = None
 
-    for idx, key in enumerate(pdf_keys):
-        local_pdf = f"/tmp/{uuid.uuid4()}.pdf"
-        s3.download_file(BUCKET, key, local_pdf)
+    # Download + estrazione testo in parallelo (I/O bound); validazione e parsing
+    # restano sequenziali nell'ordine dei file per mantenere gli stessi errori.
+    workers = max(1, min(PDF_MAX_WORKERS, len(pdf_keys)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_fetch_and_extract, key) for key in pdf_keys]
 
-        text = extract_text(local_pdf)
-        doc_type = detect_document_family(text)
+    for idx, key in enumerate(pdf_keys):
+        text, doc_type = futures[idx].result()
         file_label = original_names[idx] if idx < len(original_names) else key
 
         if doc_type == "unknown":
@@ -354,8 +609,7 @@ def _process_pdf_keys(
         try:
             parsed_rows = parse_calls(text) if doc_type == DOC_HORIZON else parse_edf(text)
         except Exception as e:
-            print("PARSE ERROR:", repr(e))
-            print(traceback.format_exc())
+            logger.exception("PARSE ERROR: %r", e)
             raise ApiError(
                 500,
                 "PARSE_ERROR",
@@ -371,8 +625,6 @@ def _process_pdf_keys(
     if not detected_type:
         raise RuntimeError("No documents processed.")
 
-    # Shared temp Excel path
-    local_xlsx = f"/tmp/{uuid.uuid4()}.xlsx"
     rows: List[Dict] = []
 
     if detected_type == DOC_EDF:
@@ -381,8 +633,15 @@ def _process_pdf_keys(
         budget_max = _coerce_float(edf_filters.get("budget_max_m"))
         step_filter = _coerce_bool(edf_filters.get("step"))
 
-        # Ensure derived call_family exists
+        allowed_call_types = _call_type_allowlist(call_types)
+        opening = _prepare_date_filter(opening_filter)
+        deadline = _prepare_date_filter(deadline_filter)
+        family_prefix = call_family.lower()
+
+        # Single pass over all_rows: derived fields, call type metadata, filters and
+        # TOPIC/CALL partition (CALL rows are exported to Excel unfiltered).
         call_types_meta = {}
+        call_rows: List[Dict] = []
         for r in all_rows:
             r["call_family"] = r.get("call_family") if r.get("call_family") in EDF_CALL_FAMILY_LABELS else _edf_call_family_from_id(r.get("call_id"))
             is_large_scale = r.get("is_large_scale")
@@ -397,34 +656,26 @@ def _process_pdf_keys(
             if r["call_type"] and r["call_type"] not in call_types_meta:
                 call_types_meta[r["call_type"]] = r["funding_percentage"]
 
-        rows = [r for r in all_rows if r.get("record_level") == "TOPIC"]
-        rows = filter_edf_rows(
-            rows,
-            call_family=call_family,
-            budget_min_m=budget_min,
-            budget_max_m=budget_max,
-            step=step_filter,
-        )
-
-        # Apply shared filters (call types, budget slider, opening/deadline)
-        rows = filter_rows(
-            rows,
-            call_types=call_types,
-            min_budget_m=min_budget_m,
-            opening_filter=opening_filter,
-            deadline_filter=deadline_filter,
-            doc_type=detected_type,
-        )
+            record_level = r.get("record_level")
+            if record_level == "CALL":
+                call_rows.append(r)
+            elif (
+                record_level == "TOPIC"
+                and _edf_row_matches_filters(r, family_prefix, budget_min, budget_max, step_filter)
+                # shared filters (call types, budget slider, opening/deadline)
+                and _row_matches_filters(r, allowed_call_types, min_budget_m, opening, deadline, DOC_EDF)
+            ):
+                rows.append(r)
 
         summary_notice = _summarize_topics(rows, DOC_EDF, context=context)
 
-        write_xlsx(rows + [r for r in all_rows if r.get("record_level") == "CALL"], local_xlsx, DOC_EDF)
+        xlsx_bytes = write_xlsx(rows + call_rows, DOC_EDF)
 
         safe_base = _safe_base_name(original_names[0] if original_names else pdf_keys[0])
         if len(pdf_keys) > 1:
             safe_base = f"{safe_base}-combined"
-        out_key = f"outputs/{uuid.uuid4()}/{safe_base}.xlsx"
-        s3.upload_file(local_xlsx, BUCKET, out_key)
+        out_key = f"outputs/{uuid.uuid4().hex}/{safe_base}.xlsx"
+        _get_s3().put_object(Bucket=BUCKET, Key=out_key, Body=xlsx_bytes, ContentType=XLSX_CONTENT_TYPE)
 
         display_rows = []
         for r in rows:
@@ -438,7 +689,6 @@ def _process_pdf_keys(
                     "record_level": r.get("record_level"),
                     "call_id": r.get("call_id"),
                     "topic_id": r.get("topic_id"),
-                    "topic_id": r.get("topic_id"),
                     "topic_url": _topic_url(r.get("topic_id")),
                     "topic_title": r.get("topic_title"),
                     "title": r.get("title"),
@@ -462,7 +712,11 @@ def _process_pdf_keys(
             "summary_notice": summary_notice,
         }
 
-    # Horizon flow
+    # Horizon flow: derived fields, call type metadata, filters and enrichment of
+    # the kept rows in a single pass over all_rows.
+    allowed_call_types = _call_type_allowlist(call_types)
+    opening = _prepare_date_filter(opening_filter)
+    deadline = _prepare_date_filter(deadline_filter)
     call_types_meta = {}
     for r in all_rows:
         derived_budget = _compute_budget_per_project_m(r)
@@ -473,16 +727,11 @@ def _process_pdf_keys(
         if call_type and call_type not in call_types_meta:
             call_types_meta[call_type] = r["funding_percentage"]
 
-    rows = filter_rows(
-        all_rows,
-        call_types=call_types,
-        min_budget_m=min_budget_m,
-        opening_filter=opening_filter,
-        deadline_filter=deadline_filter,
-        doc_type=detected_type,
-    )
+        if not _row_matches_filters(r, allowed_call_types, min_budget_m, opening, deadline, DOC_HORIZON):
+            # filtered out: nothing reads the body text again
+            r.pop("topic_body", None)
+            continue
 
-    for r in rows:
         body_text = (r.get("topic_body") or "").strip()
         if not r.get("stage"):
             r["stage"] = _derive_stage_from_topic_id(r.get("topic_id")) or _derive_stage_from_topic_id(r.get("call_id"))
@@ -492,11 +741,17 @@ def _process_pdf_keys(
             r["trl"] = _extract_trl_from_text(body_text or r.get("topic_description"))
         if not r.get("topic_description") and body_text:
             r["topic_description"] = body_text
+        rows.append(r)
 
     # --- OpenAI summaries (optional) ---
     summary_notice = _summarize_topics(rows, DOC_HORIZON, context=context)
 
+    # Finalize rows for Excel and build the UI projection in the same pass
+    display_rows = []
     for r in rows:
+        # The body text was only needed for TRL/description and the summaries
+        r.pop("topic_body", None)
+
         if not r.get("topic_description") and r.get("summary"):
             r["topic_description"] = r.get("summary")
         r["summary"] = r.get("topic_description") or r.get("summary") or ""
@@ -506,23 +761,8 @@ def _process_pdf_keys(
             r["budget_per_project_min_eur_m"] = derived_budget
             r["budget_per_project_m"] = derived_budget
 
-        r.pop("topic_body", None)
-
-    write_xlsx(rows, local_xlsx, DOC_HORIZON)
-
-    safe_base = _safe_base_name(original_names[0] if original_names else pdf_keys[0])
-    if len(pdf_keys) > 1:
-        safe_base = f"{safe_base}-combined"
-    out_key = f"outputs/{uuid.uuid4()}/{safe_base}.xlsx"
-    s3.upload_file(local_xlsx, BUCKET, out_key)
-
-    display_rows = []
-    for r in rows:
         call_type = _row_call_type(r, DOC_HORIZON)
         funding = _funding_percentage(r, DOC_HORIZON)
-        if call_type and call_type not in call_types_meta:
-            call_types_meta[call_type] = funding
-
         display_rows.append(
             {
                 "topic_id": r.get("topic_id"),
@@ -541,6 +781,14 @@ def _process_pdf_keys(
             }
         )
 
+    xlsx_bytes = write_xlsx(rows, DOC_HORIZON)
+
+    safe_base = _safe_base_name(original_names[0] if original_names else pdf_keys[0])
+    if len(pdf_keys) > 1:
+        safe_base = f"{safe_base}-combined"
+    out_key = f"outputs/{uuid.uuid4().hex}/{safe_base}.xlsx"
+    _get_s3().put_object(Bucket=BUCKET, Key=out_key, Body=xlsx_bytes, ContentType=XLSX_CONTENT_TYPE)
+
     return {
         "status": "ok",
         "excel_key": out_key,
@@ -550,16 +798,62 @@ def _process_pdf_keys(
         "call_types": [{"name": k, "funding_percentage": v} for k, v in call_types_meta.items()],
         "summary_notice": summary_notice,
     }
-def extract_text(pdf_path: str) -> str:
+def extract_text(pdf_source) -> str:
     """
     Extract text with explicit page markers so parser_horizon can set 'page'.
+    pdf_source can be a filesystem path or a binary file-like object (e.g. BytesIO).
     """
-    reader = PdfReader(pdf_path)
-    chunks = []
-    for idx, p in enumerate(reader.pages, start=1):
-        chunks.append(f"\n<<<PAGE {idx}>>>\n")
-        chunks.append(p.extract_text() or "")
-    return "\n".join(chunks)
+    # pypdf and openpyxl are imported where they are used, like boto3: the UI,
+    # asset and /presign paths never load them on a cold start.
+    from pypdf import PdfReader
+
+    if PDF_PAGE_WORKERS > 1:
+        if isinstance(pdf_source, (str, os.PathLike)):
+            with open(pdf_source, "rb") as f:
+                pdf_bytes = f.read()
+        else:
+            pdf_bytes = pdf_source.read()
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        if len(reader.pages) >= PDF_PAGE_PARALLEL_MIN_PAGES:
+            return _extract_text_parallel(pdf_bytes, len(reader.pages))
+    else:
+        reader = PdfReader(pdf_source)
+
+    return _join_pages(p.extract_text() or "" for p in reader.pages)
+
+
+def _join_pages(page_texts) -> str:
+    # Write pages straight into one buffer so each page's text can be released
+    # as soon as it is copied (no list of every page alongside the joined result).
+    buf = io.StringIO()
+    for idx, page_text in enumerate(page_texts, start=1):
+        if idx > 1:
+            buf.write("\n")
+        buf.write(f"\n<<<PAGE {idx}>>>\n\n")
+        buf.write(page_text)
+    return buf.getvalue()
+
+
+def _extract_page_range(pdf_bytes: bytes, start: int, stop: int) -> List[str]:
+    from pypdf import PdfReader
+
+    # PdfReader shares one stream across pages, so every thread opens its own reader.
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _extract_text_parallel(pdf_bytes: bytes, page_count: int) -> str:
+    """
+    Same output as extract_text, with contiguous page ranges extracted in threads.
+    """
+    workers = min(PDF_PAGE_WORKERS, page_count)
+    step = -(-page_count // workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_extract_page_range, pdf_bytes, start, min(page_count, start + step))
+            for start in range(0, page_count, step)
+        ]
+        return _join_pages(page_text for future in futures for page_text in future.result())
 
 
 def _compute_budget_per_project_m(row):
@@ -570,38 +864,49 @@ def _compute_budget_per_project_m(row):
         "budget_per_project_m",
     ):
         v = row.get(key)
-        if isinstance(v, (int, float)):
+        if isinstance(v, NUMERIC_TYPES):
             vals.append(float(v))
     if vals:
         return min(vals)
     return None
 
 
-def _matches_prefix(value: str, prefix: str) -> bool:
-    pref = (prefix or "").strip()
-    if not pref:
-        return True
-    if value is None:
-        return False
-    return str(value).strip().lower().startswith(pref.lower())
+def _count_id_tags(low: str, pattern) -> int:
+    """
+    Count non-overlapping matches of pattern that start on a word boundary
+    (same result as re.findall with a leading \\b, without its per-char cost).
+    """
+    count = 0
+    pos = 0
+    while True:
+        m = pattern.search(low, pos)
+        if not m:
+            return count
+        start = m.start()
+        if start and (low[start - 1].isalnum() or low[start - 1] == "_"):
+            pos = start + 1
+            continue
+        count += 1
+        pos = m.end()
 
 
 def detect_document_family(text: str, expected_type: Optional[str] = None) -> str:
     low = (text or "").lower()
     expected = (expected_type or "").strip().lower()
 
-    edf_ids = re.findall(r"\bedf-\d{4}-[a-z]{2,}", text, flags=re.IGNORECASE)
-    horizon_ids = re.findall(r"\bhorizon-[a-z0-9]+-\d{4}-", text, flags=re.IGNORECASE)
+    edf_ids = _count_id_tags(low, RE_EDF_ID_TAG)
+    edf_strong = "european defence fund" in low or edf_ids >= 2
+    horizon_named = "horizon europe" in low or "work programme" in low
 
-    edf_strong = "european defence fund" in low or len(edf_ids) >= 2
-    horizon_strong = (
-        "horizon europe" in low
-        or "work programme" in low
-        or bool(horizon_ids)
-    )
+    # The Horizon ID count only matters for the score comparison below
+    if horizon_named and not edf_strong:
+        return DOC_HORIZON
+
+    horizon_ids = _count_id_tags(low, RE_HORIZON_ID_TAG)
+    horizon_strong = horizon_named or horizon_ids > 0
 
-    edf_score = (2 * len(edf_ids)) + (5 if edf_strong else 0)
-    horizon_score = (2 * len(horizon_ids)) + (5 if horizon_strong else 0)
+    edf_score = (2 * edf_ids) + (5 if edf_strong else 0)
+    horizon_score = (2 * horizon_ids) + (5 if horizon_strong else 0)
 
     if edf_strong and not horizon_strong:
         return DOC_EDF
@@ -619,10 +924,16 @@ def detect_document_family(text: str, expected_type: Optional[str] = None) -> st
     return DOC_EDF if edf_score > horizon_score else DOC_HORIZON
 
 
-def _write_horizon_xlsx(rows, xlsx_path: str):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "calls"
+def _write_horizon_xlsx(rows, target):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment
+    from openpyxl.utils import get_column_letter
+
+    # Write-only workbook: rows are streamed out instead of kept as cell objects,
+    # so column widths and per-cell styles are set up before appending.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("calls")
 
     headers = [
         "cluster",
@@ -643,38 +954,44 @@ def _write_horizon_xlsx(rows, xlsx_path: str):
         "opening_date",
         "deadline_date",
     ]
+    topic_col = headers.index("topic_id")
+    desc_col = headers.index("topic_description")
+
+    # Wrap summary and description cells
+    wrap_align = Alignment(wrap_text=True, vertical="top")
+    ws.column_dimensions[get_column_letter(desc_col + 1)].width = 100
+
     ws.append(headers)
 
     for r in rows:
-        row_payload = dict(r)
-        row_payload["topic_description"] = row_payload.get("topic_description") or row_payload.get("summary")
-        row_values = [row_payload.get(h) for h in headers]
-        ws.append(row_values)
+        row_values = list(map(r.get, headers))
+        row_values[desc_col] = r.get("topic_description") or r.get("summary")
+
+        desc_cell = WriteOnlyCell(ws, value=row_values[desc_col])
+        desc_cell.alignment = wrap_align
+        row_values[desc_col] = desc_cell
 
-    # apply hyperlink to topic_id column (6th col)
-    for idx, r in enumerate(rows, start=2):  # header is row 1
-        cell = ws.cell(row=idx, column=6)
+        # hyperlink on the topic_id column
         url = _topic_url(r.get("topic_id"))
         if url:
-            cell.hyperlink = url
-            cell.style = "Hyperlink"
+            topic_cell = WriteOnlyCell(ws, value=row_values[topic_col])
+            topic_cell.hyperlink = url
+            topic_cell.style = "Hyperlink"
+            row_values[topic_col] = topic_cell
 
-    # Wrap summary and description cells
-    wrap_align = Alignment(wrap_text=True, vertical="top")
-    desc_col_idx = headers.index("topic_description") + 1
-    desc_col_letter = ws.cell(row=1, column=desc_col_idx).column_letter
-    ws.column_dimensions[desc_col_letter].width = 100
+        ws.append(row_values)
 
-    for row_idx in range(2, ws.max_row + 1):
-        ws.cell(row=row_idx, column=desc_col_idx).alignment = wrap_align
+    wb.save(target)
 
-    wb.save(xlsx_path)
 
+def _write_edf_xlsx(rows, target):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment
+    from openpyxl.utils import get_column_letter
 
-def _write_edf_xlsx(rows, xlsx_path: str):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "edf"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("edf")
 
     headers = [
         "record_level",
@@ -697,34 +1014,42 @@ def _write_edf_xlsx(rows, xlsx_path: str):
         "is_large_scale",
         "topic_description_verbatim",
     ]
-    ws.append(headers)
-
-    for r in rows:
-        ws.append([r.get(h) for h in headers])
+    desc_col = headers.index("topic_description_verbatim")
+    summary_col = headers.index("summary")
 
     # Wrap long verbatim descriptions
     wrap_align = Alignment(wrap_text=True, vertical="top")
-    desc_col_idx = headers.index("topic_description_verbatim") + 1
-    desc_col_letter = ws.cell(row=1, column=desc_col_idx).column_letter
-    ws.column_dimensions[desc_col_letter].width = 100
-    summary_col_idx = headers.index("summary") + 1
-    summary_col_letter = ws.cell(row=1, column=summary_col_idx).column_letter
-    ws.column_dimensions[summary_col_letter].width = 80
+    ws.column_dimensions[get_column_letter(desc_col + 1)].width = 100
+    ws.column_dimensions[get_column_letter(summary_col + 1)].width = 80
 
-    for row_idx in range(2, ws.max_row + 1):
-        ws.cell(row=row_idx, column=desc_col_idx).alignment = wrap_align
-        ws.cell(row=row_idx, column=summary_col_idx).alignment = wrap_align
+    ws.append(headers)
+
+    for r in rows:
+        row_values = list(map(r.get, headers))
+        for col in (summary_col, desc_col):
+            cell = WriteOnlyCell(ws, value=row_values[col])
+            cell.alignment = wrap_align
+            row_values[col] = cell
+        ws.append(row_values)
 
-    wb.save(xlsx_path)
+    wb.save(target)
 
 
-def write_xlsx(rows, xlsx_path: str, doc_type: str):
+def write_xlsx(rows, doc_type: str) -> bytes:
+    """
+    Build the workbook in memory and return the .xlsx bytes (no /tmp file).
+    """
+    buf = io.BytesIO()
     if doc_type == DOC_EDF:
-        _write_edf_xlsx(rows, xlsx_path)
+        _write_edf_xlsx(rows, buf)
     else:
-        _write_horizon_xlsx(rows, xlsx_path)
+        _write_horizon_xlsx(rows, buf)
+    return buf.getvalue()
 
 
+# Work programmes share a handful of opening/deadline strings across many topics,
+# so the parsed dates are memoized (the result is an immutable date or None).
+@lru_cache(maxsize=4096)
 def _parse_date(s: str):
     """
     Parse YYYY, YYYY-MM, or YYYY-MM-DD into a date object.
@@ -738,78 +1063,26 @@ def _parse_date(s: str):
     # Remove trailing punctuation that often appears in PDF extracts
     txt = txt.rstrip(".,;")
 
-    m_full = re.match(r"^(\d{4})-(\d{2})-(\d{2})$", txt)
-    if m_full:
-        y, mo, d = int(m_full.group(1)), int(m_full.group(2)), int(m_full.group(3))
-        try:
-            return date(y, mo, d)
-        except ValueError:
-            return None
+    m = RE_DATE.match(txt)
+    if not m:
+        return None
 
-    m_month = re.match(r"^(\d{4})-(\d{2})$", txt)
-    if m_month:
-        y, mo = int(m_month.group(1)), int(m_month.group(2))
-        try:
+    try:
+        if m.group("ymd_y") is not None:
+            return date(int(m.group("ymd_y")), int(m.group("ymd_m")), int(m.group("ymd_d")))
+        if m.group("ym_y") is not None:
+            y, mo = int(m.group("ym_y")), int(m.group("ym_m"))
             return date(y, mo, calendar.monthrange(y, mo)[1])
-        except ValueError:
-            return None
-
-    m_year = re.match(r"^(\d{4})$", txt)
-    if m_year:
-        y = int(m_year.group(1))
-        try:
-            return date(y, 12, 31)
-        except ValueError:
-            return None
-
-    m_day_name = re.match(r"^(\d{1,2})\s+([A-Za-z]{3,})\.?,?\s+(\d{4})$", txt)
-    if m_day_name:
-        day = int(m_day_name.group(1))
-        mon_raw = m_day_name.group(2).strip().lower().rstrip(".")
-        year = int(m_day_name.group(3))
-        months = {
-            "jan": 1, "january": 1,
-            "feb": 2, "february": 2,
-            "mar": 3, "march": 3,
-            "apr": 4, "april": 4,
-            "may": 5,
-            "jun": 6, "june": 6,
-            "jul": 7, "july": 7,
-            "aug": 8, "august": 8,
-            "sep": 9, "sept": 9, "september": 9,
-            "oct": 10, "october": 10,
-            "nov": 11, "november": 11,
-            "dec": 12, "december": 12,
-            # Italian month names (PDFs sometimes localized)
-            "gen": 1, "gennaio": 1,
-            "febbraio": 2,
-            "marzo": 3,
-            "aprile": 4,
-            "maggio": 5,
-            "giugno": 6,
-            "luglio": 7,
-            "agosto": 8,
-            "settembre": 9,
-            "ottobre": 10,
-            "novembre": 11,
-            "dicembre": 12,
-        }
-        mo = months.get(mon_raw)
-        if mo:
-            try:
-                return date(year, mo, day)
-            except ValueError:
+        if m.group("y") is not None:
+            return date(int(m.group("y")), 12, 31)
+        if m.group("txt_y") is not None:
+            mo = MONTHS_BY_NAME.get(m.group("txt_mon").lower())
+            if not mo:
                 return None
-
-    m_day_slash = re.match(r"^(\d{1,2})[./](\d{1,2})[./](\d{4})$", txt)
-    if m_day_slash:
-        d, mo, y = int(m_day_slash.group(1)), int(m_day_slash.group(2)), int(m_day_slash.group(3))
-        try:
-            return date(y, mo, d)
-        except ValueError:
-            return None
-
-    return None
+            return date(int(m.group("txt_y")), mo, int(m.group("txt_d")))
+        return date(int(m.group("slash_y")), int(m.group("slash_m")), int(m.group("slash_d")))
+    except ValueError:
+        return None
 
 
 def _parse_filter_range(filter_value: str):
@@ -825,43 +1098,56 @@ def _parse_filter_range(filter_value: str):
     if not txt:
         return None
 
-    m_year = re.match(r"^(\d{4})$", txt)
-    if m_year:
-        y = int(m_year.group(1))
-        try:
-            return (None, date(y, 12, 31))
-        except ValueError:
-            return None
+    m = RE_FILTER_PERIOD.match(txt)
+    if not m:
+        return None
 
-    m_quarter = re.match(r"^(\d{4})-Q([1-4])$", txt, flags=re.IGNORECASE)
-    if m_quarter:
-        y = int(m_quarter.group(1))
-        q = int(m_quarter.group(2))
-        month_end = q * 3
-        try:
-            end_day = calendar.monthrange(y, month_end)[1]
-            return (None, date(y, month_end, end_day))
-        except ValueError:
-            return None
+    y = int(m.group("y"))
+    try:
+        if m.group("q") is not None:
+            month_end = int(m.group("q")) * 3
+            return (None, date(y, month_end, calendar.monthrange(y, month_end)[1]))
+        if m.group("d") is not None:
+            return (None, date(y, int(m.group("m")), int(m.group("d"))))
+        if m.group("m") is not None:
+            mo = int(m.group("m"))
+            return (None, date(y, mo, calendar.monthrange(y, mo)[1]))
+        return (None, date(y, 12, 31))
+    except ValueError:
+        return None
 
-    m_month = re.match(r"^(\d{4})-(\d{2})$", txt)
-    if m_month:
-        y, mo = int(m_month.group(1)), int(m_month.group(2))
-        try:
-            end_day = calendar.monthrange(y, mo)[1]
-            return (None, date(y, mo, end_day))
-        except ValueError:
-            return None
 
-    m_day = re.match(r"^(\d{4})-(\d{2})-(\d{2})$", txt)
-    if m_day:
-        y, mo, d = int(m_day.group(1)), int(m_day.group(2)), int(m_day.group(3))
-        try:
-            return (None, date(y, mo, d))
-        except ValueError:
-            return None
+def _prepare_date_filter(filter_value: str):
+    """
+    Parse a date filter once so it can be applied to many rows.
+    Returns None when no filter is set, else (range, prefix): range is the
+    _parse_filter_range tuple, or None with prefix holding the lowercased text
+    for the prefix-match fallback.
+    """
+    prefix = (filter_value or "").strip().lower()
+    if not prefix:
+        return None
+    rng = _parse_filter_range(filter_value)
+    return rng, (None if rng else prefix)
 
-    return None
+
+def _date_match_parsed(value: str, date_filter) -> bool:
+    if date_filter is None:
+        return True
+    rng, prefix = date_filter
+    if not rng:
+        if value is None:
+            return False
+        return str(value).strip().lower().startswith(prefix)
+
+    _start, end = rng
+    row_date = _parse_date(value)
+    if not row_date:
+        return False
+
+    if end and row_date > end:
+        return False
+    return True
 
 
 def _date_filter_match(value: str, filter_value: str) -> bool:
@@ -870,17 +1156,44 @@ def _date_filter_match(value: str, filter_value: str) -> bool:
     - If filter is a valid date/period, include rows with dates <= end_of_period.
     - Otherwise, fallback to prefix match to avoid breaking existing inputs.
     """
-    rng = _parse_filter_range(filter_value)
-    if not rng:
-        return _matches_prefix(value, filter_value)
+    return _date_match_parsed(value, _prepare_date_filter(filter_value))
 
-    _start, end = rng
-    row_date = _parse_date(value)
-    if not row_date:
+
+def _call_type_allowlist(call_types) -> Optional[set]:
+    if call_types is None:
+        return None
+    return {str(t).strip().lower() for t in call_types if str(t).strip()}
+
+
+def _row_matches_filters(
+    r: Dict,
+    allowed: Optional[set],
+    min_budget_m: Optional[float],
+    opening: Optional[tuple],
+    deadline: Optional[tuple],
+    doc_type: str,
+) -> bool:
+    """
+    opening/deadline are date filters already parsed by _prepare_date_filter.
+    """
+    if allowed is not None:
+        cur = (_row_call_type(r, doc_type) or "").strip().lower()
+        if cur not in allowed:
+            return False
+
+    if min_budget_m is not None:
+        budget_val = _row_min_budget(r)
+        if budget_val is None:
+            budget_val = 0.0
+        if budget_val < min_budget_m:
+            return False
+
+    if opening is not None and not _date_match_parsed(r.get("opening_date"), opening):
         return False
 
-    if end and row_date > end:
+    if deadline is not None and not _date_match_parsed(r.get("deadline_date"), deadline):
         return False
+
     return True
 
 
@@ -892,33 +1205,44 @@ def filter_rows(
     deadline_filter: str = "",
     doc_type: str = DOC_HORIZON,
 ):
-    allowed = None
-    if call_types is not None:
-        allowed = {str(t).strip().lower() for t in call_types if str(t).strip()}
-
-    filtered = []
-    for r in rows:
-        if allowed is not None:
-            cur = (_row_call_type(r, doc_type) or "").strip().lower()
-            if cur not in allowed:
-                continue
+    allowed = _call_type_allowlist(call_types)
+    opening = _prepare_date_filter(opening_filter)
+    deadline = _prepare_date_filter(deadline_filter)
+    return [
+        r for r in rows
+        if _row_matches_filters(r, allowed, min_budget_m, opening, deadline, doc_type)
+    ]
 
-        if min_budget_m is not None:
-            budget_val = _row_min_budget(r)
-            if budget_val is None:
-                budget_val = 0.0
-            if budget_val < min_budget_m:
-                continue
 
-        if not _date_filter_match(r.get("opening_date"), opening_filter):
-            continue
+def _edf_row_matches_filters(
+    r: Dict,
+    family_prefix: str,
+    budget_min_m: Optional[float],
+    budget_max_m: Optional[float],
+    step: Optional[bool],
+) -> bool:
+    if family_prefix:
+        cur = (r.get("call_family") or "").lower()
+        if not cur.startswith(family_prefix):
+            return False
 
-        if not _date_filter_match(r.get("deadline_date"), deadline_filter):
-            continue
+    budget_val = r.get("indicative_budget_eur_m")
+    if budget_min_m is not None or budget_max_m is not None:
+        if not isinstance(budget_val, NUMERIC_TYPES):
+            return False
+        if budget_min_m is not None and budget_val < budget_min_m:
+            return False
+        if budget_max_m is not None and budget_val > budget_max_m:
+            return False
 
-        filtered.append(r)
+    if step is not None:
+        cur_step = r.get("step")
+        if cur_step is None:
+            return False
+        if bool(cur_step) != bool(step):
+            return False
 
-    return filtered
+    return True
 
 
 def filter_edf_rows(
@@ -929,32 +1253,7 @@ def filter_edf_rows(
     step: Optional[bool] = None,
 ):
     fam = (call_family or "").strip().lower()
-
-    filtered = []
-    for r in rows:
-        if fam:
-            cur = (r.get("call_family") or "").lower()
-            if not cur.startswith(fam):
-                continue
-
-        budget_val = r.get("indicative_budget_eur_m")
-        if budget_min_m is not None or budget_max_m is not None:
-            if not isinstance(budget_val, (int, float)):
-                continue
-            if budget_min_m is not None and budget_val < budget_min_m:
-                continue
-            if budget_max_m is not None and budget_val > budget_max_m:
-                continue
-
-        if step is not None:
-            cur_step = r.get("step")
-            if cur_step is None:
-                continue
-            if bool(cur_step) != bool(step):
-                continue
-
-        filtered.append(r)
-    return filtered
+    return [r for r in rows if _edf_row_matches_filters(r, fam, budget_min_m, budget_max_m, step)]
 
 
 # --- OpenAI helpers (Responses API) ---
@@ -964,18 +1263,96 @@ def _extract_output_text(resp_json: dict) -> str:
     if txt:
         return txt
 
-    # Otherwise parse output array
-    out = resp_json.get("output") or []
-    parts = []
-    for item in out:
-        content = item.get("content") or []
-        for c in content:
-            # depending on the exact shape, you may see output_text or text
-            if c.get("type") == "output_text" and c.get("text"):
-                parts.append(c["text"])
-            elif c.get("type") == "text" and c.get("text"):
-                parts.append(c["text"])
-    return "\n".join(p.strip() for p in parts if p and p.strip()).strip()
+    # Otherwise parse output array (depending on the exact shape, content blocks
+    # are typed output_text or text); each piece is stripped once, blanks dropped
+    texts = (
+        c["text"].strip()
+        for item in resp_json.get("output") or []
+        for c in item.get("content") or []
+        if c.get("type") in ("output_text", "text") and c.get("text")
+    )
+    return "\n".join(t for t in texts if t)
+
+
+# One keep-alive pool for the OpenAI API, reused across calls, worker threads and warm
+# invocations (skips a TCP + TLS handshake per topic). urllib3 ships with boto3.
+_HTTP = urllib3.PoolManager(
+    num_pools=1,
+    maxsize=max(1, OPENAI_MAX_WORKERS),
+    timeout=urllib3.Timeout(connect=20, read=20),
+    retries=False,
+)
+
+# Summaries survive across invocations on a warm container (LRU, successful calls only).
+# Keyed by (model, digest of the truncated body) like the per-request cache.
+_SUMMARY_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_SUMMARY_CACHE_LOCK = threading.Lock()
+
+
+def _summary_cache_key(clean_body: str) -> tuple:
+    return (OPENAI_MODEL, hashlib.blake2b(clean_body.encode("utf-8"), digest_size=16).digest())
+
+
+def _summary_cache_get(key: tuple) -> Optional[str]:
+    with _SUMMARY_CACHE_LOCK:
+        summary = _SUMMARY_CACHE.get(key)
+        if summary is not None:
+            _SUMMARY_CACHE.move_to_end(key)
+        return summary
+
+
+def _summary_cache_put(key: tuple, summary: str) -> None:
+    if OPENAI_SUMMARY_CACHE_MAX <= 0 or not summary:
+        return
+    with _SUMMARY_CACHE_LOCK:
+        _SUMMARY_CACHE[key] = summary
+        _SUMMARY_CACHE.move_to_end(key)
+        while len(_SUMMARY_CACHE) > OPENAI_SUMMARY_CACHE_MAX:
+            _SUMMARY_CACHE.popitem(last=False)
+
+
+def _openai_post(instructions: str, user_input: str, json_mode: bool = False) -> Optional[dict]:
+    """
+    POST one Responses API request. Returns the decoded JSON, or None on any failure.
+    json_mode asks for a single JSON object as output (the instructions must say so).
+    """
+    payload = {
+        "model": OPENAI_MODEL,
+        "instructions": instructions,
+        "input": user_input,
+        "store": False,
+    }
+    if json_mode:
+        payload["text"] = {"format": {"type": "json_object"}}
+
+    try:
+        r = _HTTP.request(
+            "POST",
+            OPENAI_RESPONSES_URL,
+            body=_json_bytes(payload),
+            headers={
+                "Authorization": f"Bearer {OPENAI_API_KEY}",
+                "Content-Type": "application/json",
+            },
+        )
+        if r.status >= 400:
+            return None
+        return _json_loads(r.data)
+    except (urllib3.exceptions.HTTPError, TimeoutError):
+        return None
+    except Exception:
+        return None
+
+
+def _clip_summary(summary: str) -> str:
+    summary = (summary or "").strip()
+    if summary:
+        # Only the first two sentences are kept, so stop splitting after them.
+        sentences = RE_SENTENCE_SPLIT.split(summary, maxsplit=2)
+        summary = " ".join([p for p in sentences if p][:2]).strip()
+    if len(summary) > 240:
+        summary = summary[:240].rstrip()
+    return summary
 
 
 def _openai_topic_summary(topic_id: str, topic_title: str, body_text: str, cache: dict) -> str:
@@ -995,6 +1372,12 @@ def _openai_topic_summary(topic_id: str, topic_title: str, body_text: str, cache
     if clean_body in cache:
         return cache[clean_body]
 
+    cache_key = _summary_cache_key(clean_body)
+    cached = _summary_cache_get(cache_key)
+    if cached is not None:
+        cache[clean_body] = cached
+        return cached
+
     instructions = (
         "English only. Summarize using only the provided text. "
         "Do not invent details. "
@@ -1008,40 +1391,71 @@ def _openai_topic_summary(topic_id: str, topic_title: str, body_text: str, cache
         f"{clean_body}"
     )
 
-    payload = {
-        "model": OPENAI_MODEL,
-        "instructions": instructions,
-        "input": user_input,
-        "store": False,
-    }
-
-    req = urllib.request.Request(
-        "https://api.openai.com/v1/responses",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
-
-    try:
-        with urllib.request.urlopen(req, timeout=20) as r:
-            data = json.loads(r.read().decode("utf-8"))
-            summary = _extract_output_text(data).strip()
-            if summary:
-                sentences = re.split(r"(?<=[.!?])\s+", summary)
-                summary = " ".join([p for p in sentences if p][:2]).strip()
-            if len(summary) > 240:
-                summary = summary[:240].rstrip()
-            cache[clean_body] = summary
-            return summary
-    except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError):
+    data = _openai_post(instructions, user_input)
+    if data is None:
         cache[clean_body] = ""
         return ""
+
+    try:
+        summary = _clip_summary(_extract_output_text(data))
     except Exception:
         cache[clean_body] = ""
         return ""
+    cache[clean_body] = summary
+    _summary_cache_put(cache_key, summary)
+    return summary
+
+
+def _openai_batch_summaries(items: List[tuple], cache: dict) -> None:
+    """
+    Summarize several (topic_id, topic_title, body_text) items with one request.
+    Successful summaries are stored in the caches used by _openai_topic_summary;
+    anything missing from the reply is left for the per-topic call.
+    """
+    if not OPENAI_API_KEY:
+        return
+
+    pending: Dict[str, str] = {}
+    batch_input = []
+    for topic_id, topic_title, body_text in items:
+        clean_body = (body_text or "").strip()[:OPENAI_BODY_MAX_CHARS]
+        if not clean_body or clean_body in cache or _summary_cache_get(_summary_cache_key(clean_body)) is not None:
+            continue
+        item_id = str(len(batch_input))
+        pending[item_id] = clean_body
+        batch_input.append({"id": item_id, "topic_id": topic_id, "title": topic_title, "text": clean_body})
+
+    if len(batch_input) < 2:
+        return
+
+    instructions = (
+        "English only. For each item of the JSON array, summarize its text using only that text. "
+        "Do not invent details. "
+        "Each summary has up to 2 short sentences, maximum 240 characters. "
+        'Return only a JSON object {"summaries": [{"id": <item id>, "summary": <summary>}, ...]}.'
+    )
+
+    # JSON mode: the reply is always one parseable object (no code fences or prose)
+    data = _openai_post(instructions, _json(batch_input), json_mode=True)
+    if data is None:
+        return
+
+    try:
+        parsed = _json_loads(_extract_output_text(data))
+    except Exception:
+        return
+    entries = parsed.get("summaries") if isinstance(parsed, dict) else None
+    if not isinstance(entries, list):
+        return
+
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        clean_body = pending.get(str(entry.get("id")))
+        summary = _clip_summary(str(entry.get("summary") or ""))
+        if clean_body and summary:
+            cache[clean_body] = summary
+            _summary_cache_put(_summary_cache_key(clean_body), summary)
 
 
 def _fallback_summary_from_row(row: Dict, doc_type: str) -> str:
@@ -1049,7 +1463,7 @@ def _fallback_summary_from_row(row: Dict, doc_type: str) -> str:
     Create a short, deterministic summary when OpenAI is unavailable or skipped.
     """
     def _clean(val: str) -> str:
-        return re.sub(r"\s+", " ", str(val or "").strip())
+        return RE_WHITESPACE.sub(" ", str(val or "").strip())
 
     source_fields = []
     if doc_type == DOC_HORIZON:
@@ -1068,7 +1482,7 @@ def _fallback_summary_from_row(row: Dict, doc_type: str) -> str:
     if not blob:
         return ""
 
-    sentences = re.split(r"(?<=[.!?])\s+", blob)
+    sentences = RE_SENTENCE_SPLIT.split(blob)
     summary = " ".join(sentences[:2]).strip()
     if len(summary) > 240:
         summary = summary[:240].rstrip()
@@ -1088,9 +1502,11 @@ def _summarize_topics(rows: List[Dict], doc_type: str, context=None):
 
     max_topics = OPENAI_MAX_TOPICS if OPENAI_MAX_TOPICS > 0 else len(rows)
 
-    n = 0
+    # Pick the rows to summarize up front (same order and cap as before), then run
+    # the API calls concurrently: they are network-bound.
+    planned = []
     for r in rows:
-        if n >= max_topics:
+        if len(planned) >= max_topics:
             raw_notice = (
                 f"AI summaries are generated only for the first {max_topics} topics.\n"
                 "Parsing and Excel export still include all topics."
@@ -1102,15 +1518,6 @@ def _summarize_topics(rows: List[Dict], doc_type: str, context=None):
             )
             break
 
-        if context is not None:
-            remaining_ms = context.get_remaining_time_in_millis()
-            if remaining_ms is not None and remaining_ms < 8000:
-                notice = (
-                    "AI summaries stopped early due to limited remaining time.\n"
-                    "Parsing and Excel export still include all topics."
-                )
-                break
-
         if doc_type == DOC_HORIZON:
             source = (r.get("topic_body") or "").strip()
         else:
@@ -1120,14 +1527,65 @@ def _summarize_topics(rows: List[Dict], doc_type: str, context=None):
             r["summary"] = r.get("summary") or ""
             continue
 
+        planned.append((r, source))
+
+    # Rows sharing a (truncated) body share one call; the first row in order
+    # provides the prompt, as the per-request cache did when this ran serially.
+    groups: Dict[str, List] = {}
+    for r, source in planned:
+        groups.setdefault(source[:OPENAI_BODY_MAX_CHARS], []).append((r, source))
+
+    def _summarize_group(group) -> bool:
+        if context is not None:
+            remaining_ms = context.get_remaining_time_in_millis()
+            if remaining_ms is not None and remaining_ms < 8000:
+                return False
+
+        first, source = group[0]
         summary = _openai_topic_summary(
-            topic_id=r.get("topic_id") or r.get("call_id") or "",
-            topic_title=r.get("topic_title") or r.get("title") or "",
+            topic_id=first.get("topic_id") or first.get("call_id") or "",
+            topic_title=first.get("topic_title") or first.get("title") or "",
             body_text=source,
             cache=cache,
         )
-        r["summary"] = summary or _fallback_summary_from_row(r, doc_type)
-        n += 1
+        for r, _source in group:
+            r["summary"] = summary or _fallback_summary_from_row(r, doc_type)
+        return True
+
+    def _summarize_batch(batch) -> bool:
+        if context is not None:
+            remaining_ms = context.get_remaining_time_in_millis()
+            if remaining_ms is not None and remaining_ms < 8000:
+                return False
+
+        _openai_batch_summaries(
+            [
+                (
+                    group[0][0].get("topic_id") or group[0][0].get("call_id") or "",
+                    group[0][0].get("topic_title") or group[0][0].get("title") or "",
+                    group[0][1],
+                )
+                for group in batch
+            ],
+            cache,
+        )
+        # Cache hits for everything the batch answered; single calls for the rest
+        return all([_summarize_group(group) for group in batch])
+
+    if groups:
+        jobs = list(groups.values())
+        run_job = _summarize_group
+        if OPENAI_BATCH_SIZE > 1:
+            jobs = [jobs[i:i + OPENAI_BATCH_SIZE] for i in range(0, len(jobs), OPENAI_BATCH_SIZE)]
+            run_job = _summarize_batch
+        workers = max(1, min(OPENAI_MAX_WORKERS, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            completed = list(executor.map(run_job, jobs))
+        if not all(completed):
+            notice = (
+                "AI summaries stopped early due to limited remaining time.\n"
+                "Parsing and Excel export still include all topics."
+            )
 
     for r in rows:
         if "summary" not in r or r["summary"] is None:
@@ -1152,10 +1610,47 @@ def _resp(status_code: int, body: str, content_type: str = "application/json"):
 
 
 def _json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
     return json.dumps(obj, ensure_ascii=False)
 
 
+def _json_bytes(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(raw):
+    # raw may be str or UTF-8 bytes; both parsers raise a ValueError subclass on bad input
+    if orjson is not None:
+        return orjson.loads(raw)
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8")
+    return json.loads(raw)
+
+
+def _request_json(event) -> dict:
+    """
+    Decode the JSON body of a Function URL event. Base64 bodies are parsed from the
+    decoded bytes directly (orjson takes bytes, no intermediate str).
+    """
+    body = event.get("body")
+    if not body:
+        return {}
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return _json_loads(body)
+
+
+_TRUE_STRINGS = frozenset(("true", "yes", "1", "y", "on"))
+_FALSE_STRINGS = frozenset(("false", "no", "0", "off"))
+
+
 def _coerce_float(val):
+    if isinstance(val, NUMERIC_TYPES):
+        # JSON numbers (the usual case) skip the exception-handling path
+        return float(val)
     try:
         return float(val)
     except (TypeError, ValueError):
@@ -1167,13 +1662,102 @@ def _coerce_bool(val):
         return val
     if isinstance(val, str):
         low = val.strip().lower()
-        if low in {"true", "yes", "1", "y", "on"}:
+        if low in _TRUE_STRINGS:
             return True
-        if low in {"false", "no", "0", "off"}:
+        if low in _FALSE_STRINGS:
             return False
     return None
 
 
+# --- Presigned URLs (SigV4 query signing, same URLs as s3.generate_presigned_url) ---
+_S3_HOST = urllib.parse.urlsplit(S3_ENDPOINT).netloc
+_SIGNING_KEY_CACHE: Dict[tuple, bytes] = {}
+
+
+def _sigv4_signing_key(secret_key: str, access_key: str, datestamp: str) -> bytes:
+    # The derived key only changes with the credentials and the UTC day
+    cache_key = (access_key, secret_key, datestamp)
+    signing_key = _SIGNING_KEY_CACHE.get(cache_key)
+    if signing_key is None:
+        signing_key = ("AWS4" + secret_key).encode("utf-8")
+        for part in (datestamp, S3_REGION, "s3", "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode("utf-8"), hashlib.sha256).digest()
+        _SIGNING_KEY_CACHE.clear()
+        _SIGNING_KEY_CACHE[cache_key] = signing_key
+    return signing_key
+
+
+def _presigned_urls(client_method: str, keys: List[str], expires_in: int = 900) -> List[str]:
+    """
+    Presign several object keys of BUCKET for get_object/put_object in one go.
+    The scope, credential and query string are built once and only the path varies
+    per key. Falls back to boto3 when the Lambda credentials are not in the env.
+    """
+    access_key = os.environ.get("AWS_ACCESS_KEY_ID")
+    secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
+    if not access_key or not secret_key or not BUCKET:
+        return [
+            _get_s3().generate_presigned_url(client_method, Params={"Bucket": BUCKET, "Key": key}, ExpiresIn=expires_in)
+            for key in keys
+        ]
+
+    http_method = "PUT" if client_method == "put_object" else "GET"
+    now = datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    datestamp = amz_date[:8]
+    scope = f"{datestamp}/{S3_REGION}/s3/aws4_request"
+    signing_key = _sigv4_signing_key(secret_key, access_key, datestamp)
+
+    params = {
+        "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+        "X-Amz-Credential": f"{access_key}/{scope}",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(expires_in),
+        "X-Amz-SignedHeaders": "host",
+    }
+    session_token = os.environ.get("AWS_SESSION_TOKEN")
+    if session_token:
+        params["X-Amz-Security-Token"] = session_token
+    encoded = {k: urllib.parse.quote(v, safe="-_.~") for k, v in params.items()}
+    canonical_query = "&".join(f"{k}={encoded[k]}" for k in sorted(encoded))
+    url_query = "&".join(f"{k}={v}" for k, v in encoded.items())
+    bucket_path = "/" + urllib.parse.quote(BUCKET, safe="-_.~") + "/"
+
+    urls = []
+    for key in keys:
+        path = bucket_path + urllib.parse.quote(key, safe="/~")
+        canonical_request = f"{http_method}\n{path}\n{canonical_query}\nhost:{_S3_HOST}\n\nhost\nUNSIGNED-PAYLOAD"
+        string_to_sign = (
+            f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n"
+            + hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+        )
+        signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        urls.append(f"{S3_ENDPOINT}{path}?{url_query}&X-Amz-Signature={signature}")
+    return urls
+
+
+# Download links are reused while they still have DOWNLOAD_URL_MIN_TTL seconds left
+# (absolute expiry stored at signing time, never extended on read).
+DOWNLOAD_URL_EXPIRES = 900
+DOWNLOAD_URL_MIN_TTL = 120
+DOWNLOAD_URL_CACHE_MAX = 1024
+_DOWNLOAD_URL_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _download_url(excel_key: str) -> str:
+    now = time.time()
+    entry = _DOWNLOAD_URL_CACHE.get(excel_key)
+    if entry and entry[1] - now > DOWNLOAD_URL_MIN_TTL:
+        return entry[0]
+
+    url = _presigned_urls("get_object", [excel_key], expires_in=DOWNLOAD_URL_EXPIRES)[0]
+    _DOWNLOAD_URL_CACHE[excel_key] = (url, now + DOWNLOAD_URL_EXPIRES)
+    _DOWNLOAD_URL_CACHE.move_to_end(excel_key)
+    while len(_DOWNLOAD_URL_CACHE) > DOWNLOAD_URL_CACHE_MAX:
+        _DOWNLOAD_URL_CACHE.popitem(last=False)
+    return url
+
+
 def log_version_marker(context=None):
     request_id = getattr(context, "aws_request_id", None) or "unknown"
     function_name = getattr(context, "function_name", None) or "unknown"
@@ -1183,6 +1767,240 @@ def log_version_marker(context=None):
     )
 
 
+def _extract_params(src: dict) -> dict:
+    """
+    Map a direct-invocation event or a /process JSON body to _process_pdf_keys kwargs.
+    """
+    pdf_keys = src.get("pdf_keys") or []
+    if not pdf_keys and src.get("pdf_key"):
+        pdf_keys = [src["pdf_key"]]
+    min_budget_m = _coerce_float(src.get("min_budget_m"))
+    if min_budget_m is None:
+        min_budget_m = DEFAULT_MIN_BUDGET_M
+    return {
+        "pdf_keys": pdf_keys,
+        "call_types": src.get("call_types") or src.get("action_types"),
+        "min_budget_m": min_budget_m,
+        "opening_filter": src.get("opening_filter") or "",
+        "deadline_filter": src.get("deadline_filter") or "",
+        "original_names": src.get("original_names") or [],
+        "expected_type": src.get("expected_type") or src.get("doc_family"),
+        "edf_filters": src.get("edf_filters") or {},
+    }
+
+
+def _run_process(src: dict, context) -> dict:
+    params = _extract_params(src)
+    print("HCE_DEBUG=START parse")
+    return _process_pdf_keys(context=context, **params)
+
+
+def _topics_count(result) -> int:
+    if isinstance(result, dict):
+        rows_count = result.get("rows_count")
+        if isinstance(rows_count, int):
+            return rows_count
+        rows = result.get("rows")
+        if isinstance(rows, list):
+            return len(rows)
+    return 0
+
+
+def _log_debug_snapshot(result) -> None:
+    snapshot_rows = result.get("rows") if isinstance(result, dict) else None
+    snapshot_row = None
+    if isinstance(snapshot_rows, list):
+        # One scan: an exact id match wins, else the first id with that prefix
+        prefix_row = None
+        for row in snapshot_rows:
+            if not isinstance(row, dict):
+                continue
+            topic_id = row.get("topic_id") or row.get("id")
+            if not isinstance(topic_id, str) or not topic_id.startswith("HORIZON-CL3-2026-01-DRS-03"):
+                continue
+            if topic_id == "HORIZON-CL3-2026-01-DRS-03":
+                snapshot_row = row
+                break
+            if prefix_row is None:
+                prefix_row = row
+        if snapshot_row is None:
+            snapshot_row = prefix_row
+    if snapshot_row:
+        snapshot_id = snapshot_row.get("topic_id") or snapshot_row.get("id")
+        snapshot_title = snapshot_row.get("topic_title") or snapshot_row.get("title")
+        snapshot_trl = snapshot_row.get("trl")
+        snapshot_desc = (
+            snapshot_row.get("topic_description")
+            or snapshot_row.get("summary")
+            or snapshot_row.get("topic_description_verbatim")
+        )
+        snapshot_id = "null" if snapshot_id is None else str(snapshot_id)
+        snapshot_title = "null" if snapshot_title is None else str(snapshot_title)
+        snapshot_trl = "null" if snapshot_trl is None else str(snapshot_trl)
+        if snapshot_desc is None:
+            snapshot_desc = "null"
+        else:
+            snapshot_desc = str(snapshot_desc).replace("\r", " ").replace("\n", " ")
+            snapshot_desc = snapshot_desc[:200]
+        print(
+            "HCE_SNAPSHOT "
+            f"id={snapshot_id} title={snapshot_title} trl={snapshot_trl} desc={snapshot_desc}"
+        )
+
+
+def _html_not_modified(event) -> bool:
+    headers = event.get("headers") or {}
+    inm = headers.get("if-none-match") or headers.get("If-None-Match") or ""
+    tags = {t.strip() for t in inm.split(",")}
+    # Weak comparison: W/"x" and "x" name the same page
+    return "*" in tags or HTML_ETAG in tags or HTML_ETAG[2:] in tags
+
+
+def _route_index(event, context):
+    if _html_not_modified(event):
+        resp = _resp(304, "", content_type="text/html; charset=utf-8")
+    elif _accepts_gzip(event):
+        resp = _resp(200, HTML_GZIP_B64, content_type="text/html; charset=utf-8")
+        resp["headers"]["content-encoding"] = "gzip"
+        resp["isBase64Encoded"] = True
+    else:
+        resp = _resp(200, HTML, content_type="text/html; charset=utf-8")
+    resp["headers"]["vary"] = "accept-encoding"
+    resp["headers"]["etag"] = HTML_ETAG
+    resp["headers"]["cache-control"] = "no-cache"
+    return resp
+
+
+def _route_presign(event, context):
+    _require_bucket()
+    params = event.get("queryStringParameters") or {}
+    try:
+        count = int(params.get("count") or "1")
+    except ValueError:
+        count = 1
+    count = max(1, min(MAX_PDF_FILES, count))
+
+    pdf_keys = ["uploads/" + uuid.uuid4().hex + ".pdf" for _ in range(count)]
+    upload_urls = _presigned_urls("put_object", pdf_keys, expires_in=900)
+    uploads = [
+        {"upload_url": upload_url, "pdf_key": pdf_key}
+        for pdf_key, upload_url in zip(pdf_keys, upload_urls)
+    ]
+
+    payload = {"uploads": uploads}
+    if uploads:
+        payload["upload_url"] = uploads[0]["upload_url"]
+        payload["pdf_key"] = uploads[0]["pdf_key"]
+    return _resp(200, _json(payload))
+
+
+# --- Async /process: the request is re-invoked as an Event on this same function and
+# the outcome is written to S3 under TASKS_PREFIX, polled through GET /result.
+# Needs lambda:InvokeFunction on the function itself in the execution role.
+TASKS_PREFIX = "tasks/"
+# get_object errors that mean the task result is not written yet (see _route_result)
+_TASK_PENDING_CODES = frozenset(("NoSuchKey", "404", "AccessDenied", "403"))
+
+
+def _task_key(task_id: str) -> str:
+    return f"{TASKS_PREFIX}{task_id}.json"
+
+
+def _start_async_process(body: dict, context):
+    task_id = uuid.uuid4().hex
+    # Only the mapped /process parameters travel to the worker: raw body keys such as
+    # requestContext/rawPath would make handler treat the event as an HTTP request.
+    payload = _extract_params(body)
+    payload["task_id"] = task_id
+    _get_lambda().invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="Event",
+        Payload=_json_bytes(payload),
+    )
+    return _resp(202, _json({"status": "pending", "task_id": task_id}))
+
+
+def _run_async_task(event, context) -> dict:
+    """
+    Worker side of an async /process: run it and store the response body for /result.
+    """
+    task_id = event["task_id"]
+    try:
+        result = _run_process(event, context)
+        outcome = {"status": "ok", "result": result}
+        print(f"HCE_DEBUG=DONE parse topics={_topics_count(result)}")
+    except ApiError as e:
+        print("API ERROR:", repr(e))
+        outcome = {"status": "error", "status_code": e.status_code, **e.to_payload()}
+    except Exception as e:
+        logger.exception("ERROR: %r", e)
+        outcome = {"status": "error", "status_code": 500, "error": "internal", "message": str(e)}
+    _get_s3().put_object(
+        Bucket=BUCKET,
+        Key=_task_key(task_id),
+        Body=_json_bytes(outcome),
+        ContentType="application/json",
+    )
+    return outcome
+
+
+def _route_result(event, context):
+    _require_bucket()
+    params = event.get("queryStringParameters") or {}
+    task_id = (params.get("task_id") or "").strip().lower()
+    if not RE_TASK_ID.fullmatch(task_id):
+        raise ApiError(400, "INVALID_TASK_ID", "task_id is missing or malformed.")
+
+    from botocore.exceptions import ClientError
+
+    try:
+        obj = _get_s3().get_object(Bucket=BUCKET, Key=_task_key(task_id))
+    except ClientError as e:
+        # Not written yet. Without s3:ListBucket, S3 reports a missing key as 403
+        # AccessDenied instead of 404 NoSuchKey, so both mean "still running".
+        code = str((e.response.get("Error") or {}).get("Code") or "")
+        if code in _TASK_PENDING_CODES:
+            return _resp(202, _json({"status": "pending", "task_id": task_id}))
+        raise
+
+    outcome = _json_loads(obj["Body"].read())
+    if outcome.get("status") == "ok":
+        return _resp(200, _json(outcome["result"]))
+    status_code = outcome.pop("status_code", 500)
+    outcome.pop("status", None)
+    return _resp(status_code, _json(outcome))
+
+
+def _route_process(event, context):
+    _require_bucket()
+    query = event.get("queryStringParameters") or {}
+    if _coerce_bool(query.get("async")):
+        return _start_async_process(_request_json(event), context)
+    result = _run_process(_request_json(event), context)
+    topics_count = _topics_count(result)
+    if os.environ.get("HCE_DEBUG_SNAPSHOT") == "1":
+        _log_debug_snapshot(result)
+    print(f"HCE_DEBUG=DONE parse topics={topics_count}")
+    return _resp(200, _json(result))
+
+
+def _route_download(event, context):
+    _require_bucket()
+    data = _request_json(event)
+    excel_key = data["excel_key"]
+    download_url = _download_url(excel_key)
+    return _resp(200, _json({"download_url": download_url}))
+
+
+_ROUTES = {
+    ("GET", "/"): _route_index,
+    ("GET", "/presign"): _route_presign,
+    ("POST", "/process"): _route_process,
+    ("POST", "/download"): _route_download,
+    ("GET", "/result"): _route_result,
+}
+
+
 def handler(event, context):
     log_version_marker(context)
     path_value = None
@@ -1197,44 +2015,16 @@ def handler(event, context):
         print("HCE_DEBUG=ENTER handler")
     try:
         # Supporta invocazioni "dirette" (CLI) e HTTP (Lambda URL)
-        if "requestContext" not in event:
-            pdf_keys = event.get("pdf_keys") or []
-            if not pdf_keys and event.get("pdf_key"):
-                pdf_keys = [event["pdf_key"]]
-            call_types = event.get("call_types") or event.get("action_types")
-            min_budget_m = _coerce_float(event.get("min_budget_m"))
-            if min_budget_m is None:
-                min_budget_m = DEFAULT_MIN_BUDGET_M
-            original_names = event.get("original_names") or []
-            opening_filter = event.get("opening_filter") or ""
-            deadline_filter = event.get("deadline_filter") or ""
-            expected_type = event.get("expected_type") or event.get("doc_family")
-            edf_filters = event.get("edf_filters") or {}
-            print("HCE_DEBUG=START parse")
-            result = _process_pdf_keys(
-                pdf_keys,
-                context=context,
-                call_types=call_types,
-                min_budget_m=min_budget_m,
-                opening_filter=opening_filter,
-                deadline_filter=deadline_filter,
-                original_names=original_names,
-                expected_type=expected_type,
-                edf_filters=edf_filters,
-            )
-            topics_count = 0
-            if isinstance(result, dict):
-                rows_count = result.get("rows_count")
-                if isinstance(rows_count, int):
-                    topics_count = rows_count
-                else:
-                    rows = result.get("rows")
-                    if isinstance(rows, list):
-                        topics_count = len(rows)
-            print(f"HCE_DEBUG=DONE parse topics={topics_count}")
+        request_context = event.get("requestContext")
+        if request_context is None:
+            if event.get("task_id"):
+                return _run_async_task(event, context)
+            result = _run_process(event, context)
+            print(f"HCE_DEBUG=DONE parse topics={_topics_count(result)}")
             return result
 
-        method = event.get("requestContext", {}).get("http", {}).get("method", "GET")
+        http = request_context.get("http") or {}
+        method = http.get("method", "GET")
         path = event.get("rawPath", "/")
 
         if method == "OPTIONS":
@@ -1242,127 +2032,11 @@ def handler(event, context):
 
         # Serve static assets packaged with the Lambda
         if method == "GET" and path.startswith("/assets/"):
-            return _serve_asset(path)
-
-        if method == "GET" and path == "/":
-            return _resp(200, HTML, content_type="text/html; charset=utf-8")
+            return _serve_asset(path, accept_gzip=_accepts_gzip(event))
 
-        if method == "GET" and path == "/presign":
-            _require_bucket()
-            params = event.get("queryStringParameters") or {}
-            try:
-                count = int(params.get("count") or "1")
-            except ValueError:
-                count = 1
-            count = max(1, min(6, count))
-
-            uploads = []
-            for _ in range(count):
-                pdf_key = f"uploads/{uuid.uuid4()}.pdf"
-                upload_url = s3.generate_presigned_url(
-                    "put_object",
-                    Params={"Bucket": BUCKET, "Key": pdf_key},
-                    ExpiresIn=900,
-                )
-                uploads.append({"upload_url": upload_url, "pdf_key": pdf_key})
-
-            payload = {"uploads": uploads}
-            if uploads:
-                payload["upload_url"] = uploads[0]["upload_url"]
-                payload["pdf_key"] = uploads[0]["pdf_key"]
-            return _resp(200, _json(payload))
-
-        if method == "POST" and path == "/process":
-            _require_bucket()
-            body = event.get("body") or "{}"
-            data = json.loads(body)
-            pdf_keys = data.get("pdf_keys") or []
-            if not pdf_keys and data.get("pdf_key"):
-                pdf_keys = [data["pdf_key"]]
-            call_types = data.get("call_types") or data.get("action_types")
-            min_budget_m = _coerce_float(data.get("min_budget_m"))
-            if min_budget_m is None:
-                min_budget_m = DEFAULT_MIN_BUDGET_M
-            original_names = data.get("original_names") or []
-            opening_filter = data.get("opening_filter") or ""
-            deadline_filter = data.get("deadline_filter") or ""
-            expected_type = data.get("expected_type") or data.get("doc_family")
-            edf_filters = data.get("edf_filters") or {}
-            print("HCE_DEBUG=START parse")
-            result = _process_pdf_keys(
-                pdf_keys,
-                context=context,
-                call_types=call_types,
-                min_budget_m=min_budget_m,
-                opening_filter=opening_filter,
-                deadline_filter=deadline_filter,
-                original_names=original_names,
-                expected_type=expected_type,
-                edf_filters=edf_filters,
-            )
-            topics_count = 0
-            if isinstance(result, dict):
-                rows_count = result.get("rows_count")
-                if isinstance(rows_count, int):
-                    topics_count = rows_count
-                else:
-                    rows = result.get("rows")
-                    if isinstance(rows, list):
-                        topics_count = len(rows)
-            if os.environ.get("HCE_DEBUG_SNAPSHOT") == "1":
-                snapshot_rows = result.get("rows") if isinstance(result, dict) else None
-                snapshot_row = None
-                if isinstance(snapshot_rows, list):
-                    for row in snapshot_rows:
-                        if not isinstance(row, dict):
-                            continue
-                        topic_id = row.get("topic_id") or row.get("id")
-                        if isinstance(topic_id, str) and topic_id == "HORIZON-CL3-2026-01-DRS-03":
-                            snapshot_row = row
-                            break
-                    if snapshot_row is None:
-                        for row in snapshot_rows:
-                            if not isinstance(row, dict):
-                                continue
-                            topic_id = row.get("topic_id") or row.get("id")
-                            if isinstance(topic_id, str) and topic_id.startswith("HORIZON-CL3-2026-01-DRS-03"):
-                                snapshot_row = row
-                                break
-                if snapshot_row:
-                    snapshot_id = snapshot_row.get("topic_id") or snapshot_row.get("id")
-                    snapshot_title = snapshot_row.get("topic_title") or snapshot_row.get("title")
-                    snapshot_trl = snapshot_row.get("trl")
-                    snapshot_desc = (
-                        snapshot_row.get("topic_description")
-                        or snapshot_row.get("summary")
-                        or snapshot_row.get("topic_description_verbatim")
-                    )
-                    snapshot_id = "null" if snapshot_id is None else str(snapshot_id)
-                    snapshot_title = "null" if snapshot_title is None else str(snapshot_title)
-                    snapshot_trl = "null" if snapshot_trl is None else str(snapshot_trl)
-                    if snapshot_desc is None:
-                        snapshot_desc = "null"
-                    else:
-                        snapshot_desc = str(snapshot_desc).replace("\r", " ").replace("\n", " ")
-                        snapshot_desc = snapshot_desc[:200]
-                    print(
-                        "HCE_SNAPSHOT "
-                        f"id={snapshot_id} title={snapshot_title} trl={snapshot_trl} desc={snapshot_desc}"
-                    )
-            print(f"HCE_DEBUG=DONE parse topics={topics_count}")
-            return _resp(200, _json(result))
-
-        if method == "POST" and path == "/download":
-            _require_bucket()
-            body = event.get("body") or "{}"
-            data = json.loads(body)
-            excel_key = data["excel_key"]
-            download_url = s3.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": BUCKET, "Key": excel_key},
-                ExpiresIn=900,
-            )
-            return _resp(200, _json({"download_url": download_url}))
+        route = _ROUTES.get((method, path))
+        if route is not None:
+            return route(event, context)
 
         return _resp(404, _json({"error": "not_found", "path": path, "method": method}))
 
@@ -1372,8 +2046,7 @@ def handler(event, context):
 
     except Exception as e:
         # log completo su CloudWatch, ma rispondiamo con messaggio leggibile al browser
-        print("ERROR:", repr(e))
-        print(traceback.format_exc())
+        logger.exception("ERROR: %r", e)
 
         return _resp(
           500,